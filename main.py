@@ -8,13 +8,41 @@ import os
 import sys
 import json
 import time
+import logging
+import hashlib
+import sqlite3
 import re
+import random
+import threading
 import requests
+from collections import deque
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from anthropic import Anthropic
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from anthropic import Anthropic, APIConnectionError, APIStatusError
 import gspread
 from google.oauth2.service_account import Credentials
 
+try:
+    import orjson
+
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    json_loads = orjson.loads  # orjson.JSONDecodeError subclasses json's
+except ImportError:
+    def json_dumps(obj) -> str:
+        return json.dumps(obj, separators=(",", ":"))
+
+    json_loads = json.loads
+
+
+logging.basicConfig(level=logging.INFO, format="%(message)s",
+                    handlers=[logging.StreamHandler(sys.stdout)])
+logger = logging.getLogger("monitor")
+
 # =============================================================================
 # CONFIGURATION
 # =============================================================================
@@ -41,6 +69,55 @@ SEARCH_QUERIES = [
     "sustainable cocoa Ghana",
 ]
 
+# Small, fast model is plenty for classifying short article metadata
+CLAUDE_MODEL = os.getenv("CLAUDE_MODEL", "claude-3-haiku-20240307")
+
+# Anthropic tokens-per-minute budget (input + output) for this account
+CLAUDE_TPM_LIMIT = int(os.getenv("CLAUDE_TPM_LIMIT", "30000"))
+CLAUDE_MAX_RETRIES = 5
+CLAUDE_RPM_LIMIT = int(os.getenv("CLAUDE_RPM_LIMIT", "50"))
+CLAUDE_WORKERS = int(os.getenv("CLAUDE_WORKERS", "8"))
+# Output budget: ~150 tokens per analyzed article plus slack, capped at the
+# model's output limit (4096 for Claude 3 Haiku)
+CLAUDE_TOKENS_PER_ARTICLE = 150
+CLAUDE_MAX_OUTPUT_TOKENS = int(os.getenv("CLAUDE_MAX_OUTPUT_TOKENS", "4096"))
+
+# Backfills go through the Message Batches API unless disabled
+USE_BATCH_API = os.getenv("CLAUDE_BATCH_API", "1") != "0"
+# Poll quickly at first (small jobs often finish in minutes), then back off
+BATCH_POLL_INTERVAL = 10
+BATCH_POLL_MAX_INTERVAL = 120
+BATCH_POLL_MAX_ERRORS = 10
+
+# SQLite file caching Claude analyses across runs. Written after every batch,
+# and submitted message batch ids are recorded too, so an interrupted
+# backfill resumes without re-billing work. Set to an empty string to disable.
+ANALYSIS_CACHE_PATH = os.getenv("ANALYSIS_CACHE_PATH", "analysis_cache.sqlite")
+ANALYSIS_FIELDS = ("relevance", "category", "companies_mentioned",
+                   "funding_amount", "key_entities", "summary")
+
+# Articles must mention at least one of these (title or snippet) to reach Claude
+RELEVANCE_KEYWORDS = [
+    "cocoa", "cacao", "chocolate", "cocobod", "shea", "cashew", "coffee",
+    "agri", "farm", "crop", "invest", "fund", "financ",
+]
+_KEYWORD_RE = re.compile("|".join(map(re.escape, RELEVANCE_KEYWORDS)),
+                         re.IGNORECASE)
+
+# Title similarity (Jaccard over 5-char shingles, same date) treated as the
+# same story; only one copy is sent to Claude
+NEAR_DUP_THRESHOLD = 0.8
+
+# Concurrent Serper requests; drop to 4 if Serper starts rate-limiting
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "8"))
+
+# JSON cleanup patterns for Claude responses
+_FENCE = re.compile(r'```(?:json)?\s*(.*?)(?:```|$)', re.DOTALL)
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+_NEWLINE_IN_STR = re.compile(r'(?<=": ")(.*?)(?="[,}\]])', re.DOTALL)
+_JSON_ARRAY = re.compile(r'\[[\s\S]*\]')
+_JSON_OBJECT = re.compile(r'\{[^{}]*\}')
+
 # =============================================================================
 # ENVIRONMENT CHECK
 # =============================================================================
@@ -58,17 +135,35 @@ def check_environment():
     missing = [name for name, value in required.items() if not value]
 
     if missing:
-        print(f"❌ Missing environment variables: {', '.join(missing)}")
-        print("\nSet these in Railway Dashboard → Variables")
+        logger.error(f"❌ Missing environment variables: {', '.join(missing)}")
+        logger.info("\nSet these in Railway Dashboard → Variables")
         sys.exit(1)
 
-    print("✅ All environment variables found")
+    logger.info("✅ All environment variables found")
 
 # =============================================================================
 # SERPER API - NEWS SEARCH
 # =============================================================================
 
 
+def create_search_session() -> requests.Session:
+    """Create a pooled HTTP session so Serper calls reuse TCP/TLS connections.
+
+    Transient failures are retried inside urllib3 without dropping the pool.
+    """
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=0.5,
+                    status_forcelist=[429, 500, 502, 503, 504],
+                    allowed_methods=["POST"])
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16,
+                          max_retries=retries)
+    session.mount("https://", adapter)
+    return session
+
+
+_serper_session = create_search_session()
+
+
 def search_news(query: str, date_from: str, date_to: str, num_results: int = 20) -> list:
     """Search for news using Serper.dev API."""
     url = "https://google.serper.dev/news"
@@ -87,45 +182,228 @@ def search_news(query: str, date_from: str, date_to: str, num_results: int = 20)
     }
 
     try:
-        response = requests.post(url, headers=headers,
-                                 json=payload, timeout=30)
+        response = _serper_session.post(url, headers=headers, json=payload,
+                                        timeout=(5, 25))
         response.raise_for_status()
         return response.json().get("news", [])
     except Exception as e:
-        print(f"  ⚠️ Search error: {e}")
+        logger.warning(f"  ⚠️ Search error: {e}")
         return []
 
+
+def search_news_concurrent(queries: list, date_from: str, date_to: str) -> list:
+    """Run one search_news call per query in parallel.
+
+    Returns one article list per query, in query order.
+    """
+    results = [[] for _ in queries]
+    with ThreadPoolExecutor(max_workers=min(SEARCH_WORKERS, len(queries))) as executor:
+        futures = {executor.submit(search_news, q, date_from, date_to): i
+                   for i, q in enumerate(queries)}
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            results[i] = future.result()
+            logger.info(f"  [{done}/{len(queries)}] {queries[i]} → {len(results[i])} articles")
+    return results
+
+
+def search_news_bulk(queries: list, date_from: str, date_to: str,
+                     num_results: int = 20) -> list:
+    """Search many queries in one Serper request.
+
+    Returns one article list per query, or None if the request failed.
+    """
+    url = "https://google.serper.dev/news"
+
+    headers = {
+        "X-API-KEY": SERPER_API_KEY,
+        "Content-Type": "application/json"
+    }
+
+    payload = [{
+        "q": f"{query} after:{date_from} before:{date_to}",
+        "gl": "gh",
+        "num": num_results
+    } for query in queries]
+
+    try:
+        response = _serper_session.post(url, headers=headers, json=payload,
+                                        timeout=(5, 55))
+        response.raise_for_status()
+        data = response.json()
+        if not isinstance(data, list) or len(data) != len(queries):
+            raise ValueError(f"unexpected bulk response shape: {type(data).__name__}")
+        return [item.get("news", []) for item in data]
+    except Exception as e:
+        logger.warning(f"  ⚠️ Bulk search error: {e}")
+        return None
+
 # =============================================================================
 # CLAUDE AI - ARTICLE ANALYSIS
 # =============================================================================
 
 
+CLAUDE_INSTRUCTIONS = """Analyze the user's articles about Ghana agriculture. Return ONLY a JSON array.
+
+For each article, output this exact JSON structure, using the article's id:
+{"id":0,"relevance":true,"category":"cocoa","companies_mentioned":[],"funding_amount":null,"key_entities":[],"summary":"<brief>"}
+
+Categories: cocoa, shea, cashew, coffee, general_agriculture, funding_investment
+Set relevance=true only if about Ghana/Africa cash crops or agricultural investment.
+
+Articles arrive as a JSON array of [id, title, date, source] rows."""
+
+CLAUDE_PREFILL = "["
+
+# Identical across every batch, so mark it cacheable. Anthropic only caches
+# prefixes above a model-specific minimum (2048 tokens for Haiku), so hits
+# are logged per request rather than assumed.
+CLAUDE_SYSTEM = [{
+    "type": "text",
+    "text": CLAUDE_INSTRUCTIONS,
+    "cache_control": {"type": "ephemeral"},
+}]
+
+
+class TokenBucket:
+    """Sliding 60s window of token usage, paced against TPM and RPM limits.
+
+    Thread-safe: concurrent workers reserve their estimate up front and
+    settle it with actual usage once the response arrives.
+    """
+
+    def __init__(self, tokens_per_minute: int, requests_per_minute: int = None,
+                 window: float = 60.0):
+        self.limit = tokens_per_minute
+        self.rpm = requests_per_minute
+        self.window = window
+        self.usage = deque()  # [timestamp, tokens]
+        self.lock = threading.Lock()
+
+    def _expire(self, now: float):
+        while self.usage and now - self.usage[0][0] >= self.window:
+            self.usage.popleft()
+
+    def acquire(self, tokens: int) -> list:
+        """Block until `tokens` can be spent, then reserve them.
+
+        Returns the reservation to pass to record() with actual usage.
+        """
+        tokens = min(tokens, self.limit)
+        while True:
+            with self.lock:
+                now = time.time()
+                self._expire(now)
+                used = sum(t for _, t in self.usage)
+                under_rpm = self.rpm is None or len(self.usage) < self.rpm
+                if (used + tokens <= self.limit and under_rpm) or not self.usage:
+                    entry = [now, tokens]
+                    self.usage.append(entry)
+                    return entry
+                wait = self.usage[0][0] + self.window - now
+            logger.info(f"    Rate budget reached, waiting {wait:.0f}s...")
+            time.sleep(max(wait, 0.1))
+
+    def record(self, entry: list, tokens: int):
+        """Replace a reservation's estimate with tokens actually consumed."""
+        with self.lock:
+            entry[1] = tokens
+
+    def saturate(self):
+        """Mark the current window as exhausted (e.g. after a 429)."""
+        with self.lock:
+            self.usage.append([time.time(), self.limit])
+
+
+token_bucket = TokenBucket(CLAUDE_TPM_LIMIT, CLAUDE_RPM_LIMIT)
+
+
+_anthropic_client = None
+_anthropic_client_lock = threading.Lock()
+
+
+def get_claude_client() -> Anthropic:
+    """Return a shared Anthropic client so batches reuse its connection pool."""
+    global _anthropic_client
+    with _anthropic_client_lock:
+        if _anthropic_client is None:
+            # backoff() owns retries; SDK retries would multiply each attempt.
+            _anthropic_client = Anthropic(api_key=ANTHROPIC_API_KEY, max_retries=0)
+        return _anthropic_client
+
+
+def backoff(attempt: int, base: float = 1.0, cap: float = 30.0, jitter: float = 0.5) -> float:
+    """Exponential backoff delay with multiplicative jitter, capped."""
+    return min(base * (2 ** attempt) * (1 + random.uniform(0, jitter)), cap)
+
+
 def clean_json_response(text: str) -> str:
     """Clean and fix common JSON issues from Claude responses."""
     # Extract from code blocks if present
-    if "```json" in text:
-        text = text.split("```json")[1].split("```")[0]
-    elif "```" in text:
-        text = text.split("```")[1].split("```")[0]
+    match = _FENCE.search(text)
+    if match:
+        text = match.group(1)
 
     text = text.strip()
 
     # Remove trailing commas before ] or }
-    text = re.sub(r',\s*([}\]])', r'\1', text)
+    text = _TRAILING_COMMA.sub(r'\1', text)
 
     # Fix common issues with newlines in strings
     # Replace actual newlines within strings with \n escape
-    text = re.sub(r'(?<=": ")(.*?)(?="[,}\]])', lambda m: m.group(
-        1).replace('\n', '\\n'), text, flags=re.DOTALL)
+    # (skip the expensive DOTALL scan when there are no newlines at all)
+    if '\n' in text:
+        text = _NEWLINE_IN_STR.sub(
+            lambda m: m.group(1).replace('\n', '\\n'), text)
 
     return text
 
 
+def _extract_json_array(text: str):
+    """Return the first balanced top-level [...] span, ignoring brackets in strings."""
+    depth = 0
+    start = -1
+    in_str = False
+    esc = False
+    for i, c in enumerate(text):
+        if in_str:
+            if esc:
+                esc = False
+            elif c == '\\':
+                esc = True
+            elif c == '"':
+                in_str = False
+            continue
+        if c == '"':
+            in_str = True
+        elif c == '[':
+            if start < 0:
+                start = i
+            depth += 1
+        elif c == ']' and depth > 0:
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+
 def parse_json_safely(text: str) -> list:
     """Attempt to parse JSON with multiple fallback strategies."""
+    # Fast path: slice out the outer array and parse it as-is
+    span = _extract_json_array(text)
+    if span is not None:
+        try:
+            result = json_loads(span)
+            if isinstance(result, list):
+                return result
+        except json.JSONDecodeError:
+            pass
+
+    text = clean_json_response(text)
+
     # Strategy 1: Direct parse
     try:
-        result = json.loads(text)
+        result = json_loads(text)
         if isinstance(result, list):
             return result
         return []
@@ -134,10 +412,9 @@ def parse_json_safely(text: str) -> list:
 
     # Strategy 2: Extract array portion and parse
     try:
-        match = re.search(r'\[[\s\S]*\]', text)
+        match = _JSON_ARRAY.search(text)
         if match:
-            cleaned = re.sub(r',\s*([}\]])', r'\1', match.group())
-            result = json.loads(cleaned)
+            result = json_loads(match.group())
             if isinstance(result, list):
                 return result
     except json.JSONDecodeError:
@@ -146,12 +423,11 @@ def parse_json_safely(text: str) -> list:
     # Strategy 3: Try to fix and parse individual objects
     try:
         # Find all JSON-like objects
-        objects = re.findall(r'\{[^{}]*\}', text)
+        objects = _JSON_OBJECT.findall(text)
         results = []
         for obj in objects:
             try:
-                cleaned = re.sub(r',\s*([}\]])', r'\1', obj)
-                parsed = json.loads(cleaned)
+                parsed = json_loads(obj)
                 results.append(parsed)
             except json.JSONDecodeError:
                 continue
@@ -163,236 +439,735 @@ def parse_json_safely(text: str) -> list:
     return []
 
 
-def analyze_articles_with_claude(articles: list, retry_count: int = 0) -> list:
-    """Use Claude to filter and categorize articles."""
+def build_claude_prompt(articles: list) -> str:
+    """Serialize a batch of articles for the user message."""
+    # Positional rows avoid repeating key names per article, and an index
+    # replaces the link; original fields are re-attached later
+    article_list = [
+        [i, a.get("title", "")[:100], a.get("date", ""), a.get("source", "")]
+        for i, a in enumerate(articles)
+    ]
+    return json_dumps(article_list)
+
+
+def max_articles_per_request() -> int:
+    """Largest batch whose expected output fits within CLAUDE_MAX_OUTPUT_TOKENS."""
+    return max(1, (CLAUDE_MAX_OUTPUT_TOKENS - 200) // CLAUDE_TOKENS_PER_ARTICLE)
+
+
+def make_batches(articles: list) -> list:
+    """Split articles into the fewest batches that fit the output token budget.
+
+    Batches are evenly sized so concurrent requests finish at similar times,
+    and never exceed max_tokens (a truncated response costs a retry).
+    """
     if not articles:
         return []
+    per_batch = max_articles_per_request()
+    count = -(-len(articles) // per_batch)
+    size = -(-len(articles) // count)
+    return [articles[i:i + size] for i in range(0, len(articles), size)]
+
+
+def build_claude_params(articles: list) -> dict:
+    """Request parameters shared by the sync and Message Batches paths."""
+    max_tokens = min(CLAUDE_MAX_OUTPUT_TOKENS,
+                     CLAUDE_TOKENS_PER_ARTICLE * len(articles) + 200)
+    return {
+        "model": CLAUDE_MODEL,
+        "max_tokens": max_tokens,
+        "system": CLAUDE_SYSTEM,
+        "messages": [
+            {"role": "user", "content": build_claude_prompt(articles)},
+            # Prefilling the array start keeps output in raw JSON, so a
+            # markdown fence can only ever appear as a trailer
+            {"role": "assistant", "content": CLAUDE_PREFILL},
+        ],
+        "stop_sequences": ["```"],
+    }
 
-    client = Anthropic(api_key=ANTHROPIC_API_KEY)
 
-    # Build article list with full field names
-    article_list = []
-    for a in articles:
-        article_list.append({
-            "title": a.get("title", "")[:100],
-            "link": a.get("link", ""),
-            "date": a.get("date", ""),
-            "source": a.get("source", "")
-        })
+def _to_list(value) -> list:
+    """Coerce a field Claude may return as a string or None into a list of str."""
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    return []
 
-    prompt = f"""Analyze these articles about Ghana agriculture. Return ONLY a JSON array.
 
-For each article, output this exact JSON structure:
-{{"original_title":"<title>","original_link":"<link>","original_date":"<date>","original_source":"<source>","relevance":true,"category":"cocoa","companies_mentioned":[],"funding_amount":null,"key_entities":[],"summary":"<brief>"}}
+def attach_article_fields(results: list, articles: list) -> list:
+    """Map Claude results back to their source articles by id.
 
-Categories: cocoa, shea, cashew, coffee, general_agriculture, funding_investment
-Set relevance=true only if about Ghana/Africa cash crops or agricultural investment.
+    Also normalizes field types once here so sheet rows can be built directly.
+    Repeated ids keep only their first result.
+    """
+    attached = []
+    seen = set()
+    for r in results:
+        idx = r.get("id") if isinstance(r, dict) else None
+        if not isinstance(idx, int) or not 0 <= idx < len(articles) or idx in seen:
+            continue
+        seen.add(idx)
+        a = articles[idx]
+        r["original_title"] = str(a.get("title", ""))
+        r["original_link"] = str(a.get("link", ""))
+        r["original_date"] = str(a.get("date", ""))
+        r["original_source"] = str(a.get("source", ""))
+        r["category"] = str(r.get("category") or "")
+        r["summary"] = str(r.get("summary") or "")
+        r["funding_amount"] = str(r.get("funding_amount") or "")
+        r["companies_mentioned"] = _to_list(r.get("companies_mentioned"))
+        r["key_entities"] = _to_list(r.get("key_entities"))
+        attached.append(r)
+    return attached
+
+
+def analyze_articles_with_claude(articles: list, retry_count: int = 0) -> list:
+    """Use Claude to filter and categorize articles."""
+    if not articles:
+        return []
 
-Articles:
-{json.dumps(article_list)}
+    client = get_claude_client()
+    params = build_claude_params(articles)
 
-JSON array:"""
+    # Rough estimate (~4 chars/token) so we only wait when we'd overshoot
+    prompt = params["messages"][0]["content"]
+    reservation = token_bucket.acquire(
+        (len(CLAUDE_INSTRUCTIONS) + len(prompt)) // 4 + params["max_tokens"])
 
     try:
-        response = client.messages.create(
-            model="claude-3-haiku-20240307",
-            max_tokens=2000,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        response = client.messages.create(**params)
+        token_bucket.record(reservation, response.usage.input_tokens +
+                            response.usage.output_tokens)
 
-        text = response.content[0].text
-        print(f"    Raw response length: {len(text)} chars")
+        text = CLAUDE_PREFILL + response.content[0].text
+        cache_read = getattr(response.usage, "cache_read_input_tokens", None) or 0
+        logger.info(f"    Raw response length: {len(text)} chars"
+                    f"{f', {cache_read} prompt tokens from cache' if cache_read else ''}")
 
-        cleaned = clean_json_response(text)
-        results = parse_json_safely(cleaned)
+        results = attach_article_fields(parse_json_safely(text), articles)
 
         if results:
-            print(f"    Parsed {len(results)} items")
+            logger.info(f"    Parsed {len(results)} items")
             return results
 
         # Debug: show first 200 chars of response
-        print(f"    Parse failed. Response preview: {text[:200]}...")
+        logger.info(f"    Parse failed. Response preview: {text[:200]}...")
 
         if text and retry_count < 1:
-            print(f"    Retrying...")
-            time.sleep(10)
+            delay = backoff(retry_count)
+            logger.info(f"    Retrying in {delay:.1f}s...")
+            time.sleep(delay)
             return analyze_articles_with_claude(articles, retry_count + 1)
 
         return []
 
-    except Exception as e:
-        error_msg = str(e)
-        if "rate_limit" in error_msg.lower() and retry_count < 3:
-            wait = 180 * (retry_count + 1)
-            print(f"    Rate limited, waiting {wait//60} min...")
-            time.sleep(wait)
+    except APIStatusError as e:
+        status = e.status_code
+        if status in (429, 529) and retry_count < CLAUDE_MAX_RETRIES:
+            if status == 429:
+                token_bucket.saturate()
+            delay = backoff(retry_count)
+            logger.info(f"    {'Rate limited' if status == 429 else 'API overloaded'} "
+                        f"({status}), retry {retry_count + 1} in {delay:.1f}s...")
+            time.sleep(delay)
+            return analyze_articles_with_claude(articles, retry_count + 1)
+        if status >= 500 and retry_count < CLAUDE_MAX_RETRIES:
+            delay = backoff(retry_count, cap=120.0)
+            logger.info(f"    Server error ({status}), retry {retry_count + 1} in {delay:.1f}s...")
+            time.sleep(delay)
+            return analyze_articles_with_claude(articles, retry_count + 1)
+        logger.warning(f"  ⚠️ Claude error ({status}): {e}")
+        return []
+    except APIConnectionError as e:
+        if retry_count < CLAUDE_MAX_RETRIES:
+            delay = backoff(retry_count, cap=120.0)
+            logger.info(f"    Connection error, retry {retry_count + 1} in {delay:.1f}s...")
+            time.sleep(delay)
             return analyze_articles_with_claude(articles, retry_count + 1)
-        print(f"  ⚠️ Claude error: {e}")
+        logger.warning(f"  ⚠️ Claude error: {e}")
+        return []
+    except Exception as e:
+        logger.warning(f"  ⚠️ Claude error: {e}")
+        return []
+
+
+def analyze_articles_batch_api(batches: list) -> list:
+    """Analyze all batches through the Message Batches API (half price, no RPM limits).
+
+    Batches that error or expire are retried through the synchronous path.
+    Returns None only if the job could not be submitted (or was cancelled
+    after polling kept failing), so the caller can fall back.
+    """
+    if not batches:
         return []
 
+    client = get_claude_client()
+    requests_ = [{
+        "custom_id": str(i),
+        "params": build_claude_params(batch),
+    } for i, batch in enumerate(batches)]
+
+    try:
+        job = client.messages.batches.create(requests=requests_)
+    except Exception as e:
+        logger.warning(f"  ⚠️ Batch API error: {e}")
+        return None
+    logger.info(f"  Submitted message batch {job.id} ({len(requests_)} requests)")
+    save_batch_job(job.id, batches)
+
+    if not wait_for_batch_job(client, job.id):
+        forget_batch_job(job.id)
+        return None
+    analyzed, failed = collect_batch_results(client, job.id, batches)
+    forget_batch_job(job.id)
+
+    if failed:
+        logger.info(f"  Retrying {len(failed)} failed batches synchronously...")
+        with ThreadPoolExecutor(max_workers=CLAUDE_WORKERS) as executor:
+            for batch, results in zip(failed, executor.map(analyze_articles_with_claude, failed)):
+                analyzed.extend(results)
+                cache_analyses(results, batch)
+
+    return analyzed
+
+
+def wait_for_batch_job(client, job_id: str) -> bool:
+    """Poll a message batch until it ends, tolerating transient errors.
+
+    After BATCH_POLL_MAX_ERRORS consecutive failures the job is cancelled so
+    it is not billed alongside the fallback, and False is returned.
+    """
+    started = time.time()
+    interval = BATCH_POLL_INTERVAL
+    errors = 0
+    while True:
+        try:
+            job = client.messages.batches.retrieve(job_id)
+        except Exception as e:
+            errors += 1
+            logger.warning(f"  ⚠️ Batch poll error ({errors}/{BATCH_POLL_MAX_ERRORS}): {e}")
+            if errors >= BATCH_POLL_MAX_ERRORS:
+                try:
+                    client.messages.batches.cancel(job_id)
+                    logger.warning(f"  ⚠️ Cancelled message batch {job_id}")
+                except Exception as cancel_error:
+                    logger.warning(f"  ⚠️ Could not cancel message batch {job_id}: {cancel_error}")
+                return False
+        else:
+            errors = 0
+            counts = job.request_counts
+            logger.info(f"    [{(time.time() - started) / 60:.1f} min] "
+                        f"{job.processing_status}: {counts.succeeded} succeeded, "
+                        f"{counts.processing} processing, {counts.errored} errored")
+            if job.processing_status == "ended":
+                return True
+        time.sleep(interval)
+        interval = min(interval * 2, BATCH_POLL_MAX_INTERVAL)
+
+
+def collect_batch_results(client, job_id: str, batches: list) -> tuple:
+    """Read an ended message batch. Returns (analyzed, failed batches).
+
+    Results are cached as they are read. A broken entry only fails its own
+    batch, and an interrupted results stream is re-read; batches still
+    unread after that are reported as failed.
+    """
+    analyzed = []
+    done = set()
+    failed_ids = set()
+    for attempt in range(3):
+        try:
+            for entry in client.messages.batches.results(job_id):
+                idx = int(entry.custom_id)
+                if idx in done or idx in failed_ids:
+                    continue
+                batch = batches[idx]
+                try:
+                    if entry.result.type != "succeeded":
+                        raise ValueError(f"result {entry.result.type}")
+                    text = CLAUDE_PREFILL + entry.result.message.content[0].text
+                    results = attach_article_fields(parse_json_safely(text), batch)
+                except Exception as e:
+                    logger.warning(f"  ⚠️ Batch request {idx} failed: {e}")
+                    results = []
+                if results:
+                    analyzed.extend(results)
+                    cache_analyses(results, batch)
+                    done.add(idx)
+                else:
+                    failed_ids.add(idx)
+            break
+        except Exception as e:
+            logger.warning(f"  ⚠️ Batch results error: {e}")
+            time.sleep(backoff(attempt))
+    failed = [b for i, b in enumerate(batches) if i not in done]
+    return analyzed, failed
+
+
+# Namespace cache keys by model and instructions so prompt changes invalidate
+_ANALYSIS_CACHE_NAMESPACE = hashlib.blake2b(
+    (CLAUDE_MODEL + CLAUDE_INSTRUCTIONS).encode(), digest_size=8).hexdigest()
+
+
+def article_cache_key(article: dict) -> str:
+    """Hash of exactly what Claude sees for an article."""
+    payload = json_dumps([_ANALYSIS_CACHE_NAMESPACE, article.get("title", "")[:100],
+                          article.get("date", ""), article.get("source", "")])
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def _open_analysis_cache() -> sqlite3.Connection:
+    conn = sqlite3.connect(ANALYSIS_CACHE_PATH)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS analyses (key TEXT PRIMARY KEY, result TEXT)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS batch_jobs (job_id TEXT PRIMARY KEY, batches TEXT)")
+    return conn
+
+
+def save_batch_job(job_id: str, batches: list):
+    """Remember a submitted message batch so a restarted run can collect it."""
+    if not ANALYSIS_CACHE_PATH:
+        return
+    try:
+        with closing(_open_analysis_cache()) as conn:
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO batch_jobs (job_id, batches) VALUES (?, ?)",
+                             (job_id, json_dumps(batches)))
+    except sqlite3.Error as e:
+        logger.warning(f"  ⚠️ Analysis cache error: {e}")
+
+
+def forget_batch_job(job_id: str):
+    """Drop a message batch whose results have been collected (or abandoned)."""
+    if not ANALYSIS_CACHE_PATH:
+        return
+    try:
+        with closing(_open_analysis_cache()) as conn:
+            with conn:
+                conn.execute("DELETE FROM batch_jobs WHERE job_id = ?", (job_id,))
+    except sqlite3.Error as e:
+        logger.warning(f"  ⚠️ Analysis cache error: {e}")
+
+
+def resume_batch_jobs() -> dict:
+    """Collect message batches submitted by an interrupted run.
+
+    Returns their analyses by article link. Serper's relative dates
+    ("3 hours ago") drift between runs, so the content-hash cache would
+    miss these and the current run would pay for them twice.
+    """
+    recovered = {}
+    if not ANALYSIS_CACHE_PATH:
+        return recovered
+    try:
+        with closing(_open_analysis_cache()) as conn:
+            pending = conn.execute("SELECT job_id, batches FROM batch_jobs").fetchall()
+    except sqlite3.Error as e:
+        logger.warning(f"  ⚠️ Analysis cache error: {e}")
+        return recovered
+    if not pending:
+        return recovered
+    client = get_claude_client()
+    for job_id, batches_json in pending:
+        logger.info(f"  Resuming message batch {job_id} from a previous run")
+        batches = json_loads(batches_json)
+        if wait_for_batch_job(client, job_id):
+            analyzed, failed = collect_batch_results(client, job_id, batches)
+            for r in analyzed:
+                recovered[r["original_link"]] = {f: r.get(f) for f in ANALYSIS_FIELDS}
+            logger.info(f"  Recovered {len(analyzed)} results "
+                        f"({len(failed)} batches will be re-analyzed)")
+        forget_batch_job(job_id)
+    return recovered
+
+
+def split_recovered_articles(articles: list, recovered: dict) -> tuple:
+    """Return (results recovered by link, articles that still need Claude)."""
+    results = []
+    misses = []
+    for article in articles:
+        result = recovered.get(article.get("link"))
+        if result is None:
+            misses.append(article)
+            continue
+        results.extend(attach_article_fields([dict(result, id=0)], [article]))
+    return results, misses
+
+
+def split_cached_articles(articles: list) -> tuple:
+    """Return (cached results, articles that still need Claude)."""
+    if not ANALYSIS_CACHE_PATH:
+        return [], articles
+    cached = []
+    misses = []
+    try:
+        with closing(_open_analysis_cache()) as conn:
+            for article in articles:
+                row = conn.execute("SELECT result FROM analyses WHERE key = ?",
+                                   (article_cache_key(article),)).fetchone()
+                if row is None:
+                    misses.append(article)
+                    continue
+                result = json_loads(row[0])
+                result["id"] = 0
+                cached.extend(attach_article_fields([result], [article]))
+    except sqlite3.Error as e:
+        logger.warning(f"  ⚠️ Analysis cache error: {e}")
+        return [], articles
+    return cached, misses
+
+
+def cache_analyses(results: list, articles: list):
+    """Store Claude results keyed by their source article's content hash."""
+    if not ANALYSIS_CACHE_PATH or not results:
+        return
+    by_link = {a["link"]: a for a in articles}
+    rows = [(article_cache_key(by_link[r["original_link"]]),
+             json_dumps({f: r.get(f) for f in ANALYSIS_FIELDS}))
+            for r in results if r.get("original_link") in by_link]
+    try:
+        with closing(_open_analysis_cache()) as conn:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO analyses (key, result) VALUES (?, ?)", rows)
+    except sqlite3.Error as e:
+        logger.warning(f"  ⚠️ Analysis cache error: {e}")
+
 # =============================================================================
 # GOOGLE SHEETS
 # =============================================================================
 
 
+# Optional local copy of column H so re-runs only read newly added rows.
+# Unset by default: Railway's filesystem does not survive redeploys, and the
+# cache assumes rows are only ever appended, never deleted or reordered.
+URL_CACHE_PATH = os.getenv("URL_CACHE_PATH")
+
+# Rows per append request (10 columns -> 10k cells)
+SHEETS_APPEND_CHUNK = 1000
+
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive"
+]
+
+# Rebuild the client a little before the 1h OAuth token lifetime
+SHEETS_CLIENT_TTL = 3000
+
+_sheets_creds_dict = None
+_sheets_client = None
+_sheets_client_expiry = 0
+
+
 def get_sheets_client():
-    """Create authorized Google Sheets client."""
-    scopes = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive"
-    ]
+    """Return an authorized Google Sheets client, cached until near token expiry."""
+    global _sheets_creds_dict, _sheets_client, _sheets_client_expiry
+    now = time.time()
+    if _sheets_client is None or now > _sheets_client_expiry:
+        if _sheets_creds_dict is None:
+            _sheets_creds_dict = json_loads(GOOGLE_CREDENTIALS_JSON)
+        creds = Credentials.from_service_account_info(
+            _sheets_creds_dict, scopes=SCOPES)
+        _sheets_client = gspread.authorize(creds)
+        _sheets_client_expiry = now + SHEETS_CLIENT_TTL
+    return _sheets_client
 
-    creds_dict = json.loads(GOOGLE_CREDENTIALS_JSON)
-    creds = Credentials.from_service_account_info(creds_dict, scopes=scopes)
 
-    return gspread.authorize(creds)
+_news_sheet = None
+_news_sheet_client = None
 
 
-def get_existing_urls(sheet) -> set:
-    """Get URLs already in sheet to avoid duplicates."""
-    try:
-        return set(sheet.col_values(8)[1:])  # Column H, skip header
-    except:
-        return set()
+def open_news_sheet():
+    """Open the "News Data" worksheet, reusing the handle while the client is valid."""
+    global _news_sheet, _news_sheet_client
+    client = get_sheets_client()
+    if _news_sheet is None or _news_sheet_client is not client:
+        _news_sheet = client.open_by_key(GOOGLE_SHEETS_ID).worksheet("News Data")
+        _news_sheet_client = client
+    return _news_sheet
 
 
-def append_to_sheet(articles: list) -> int:
-    """Add articles to Google Sheet. Returns count added."""
-    if not articles:
-        print("  No articles to add")
-        return 0
+# Existing URLs per spreadsheet, fetched once per run
+_existing_urls_cache = {}
+
+
+def load_url_cache(sheet_id: str) -> list:
+    """Load column H as of the last run, in sheet order (empty if none/stale)."""
+    if not URL_CACHE_PATH or not os.path.exists(URL_CACHE_PATH):
+        return []
+    with open(URL_CACHE_PATH, encoding="utf-8") as f:
+        lines = f.read().split("\n")
+    # First line records which spreadsheet the cache belongs to
+    if lines[0] != sheet_id:
+        return []
+    return lines[1:]
 
-    print(f"  Processing {len(articles)} articles for sheet...")
 
+def save_url_cache(sheet_id: str, cached: list, tail: list):
+    """Record a successful column H read: extend a valid cache, else rewrite it.
+
+    Only called with rows just read from the sheet, so the file always mirrors
+    column H in order, including rows written by other tools (e.g. n8n).
+    """
+    if not URL_CACHE_PATH:
+        return
     try:
-        client = get_sheets_client()
-        sheet = client.open_by_key(GOOGLE_SHEETS_ID).worksheet("News Data")
+        if cached:
+            if tail:
+                with open(URL_CACHE_PATH, "a", encoding="utf-8") as f:
+                    f.write("\n" + "\n".join(tail))
+            return
+        tmp_path = URL_CACHE_PATH + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join([sheet_id] + tail))
+        os.replace(tmp_path, URL_CACHE_PATH)
+    except OSError as e:
+        logger.warning(f"  ⚠️ Could not update URL cache: {e}")
 
-        existing_urls = get_existing_urls(sheet)
-        print(f"  Found {len(existing_urls)} existing URLs")
 
-        rows = []
-        skipped_relevance = 0
-        skipped_duplicate = 0
+def get_existing_urls(sheet) -> set:
+    """Get URLs already in sheet to avoid duplicates.
 
-        for article in articles:
-            if not article.get("relevance"):
-                skipped_relevance += 1
-                continue
+    With URL_CACHE_PATH set, only rows added since the last run are read.
+    """
+    key = sheet.spreadsheet.id
+    if key in _existing_urls_cache:
+        return _existing_urls_cache[key]
+    try:
+        cached = load_url_cache(key)
+        # Column H, skip header and rows already cached - one values.get request
+        data = sheet.spreadsheet.values_get(
+            f"'{sheet.title}'!H{len(cached) + 2}:H",
+            params={"majorDimension": "COLUMNS"})
+        columns = data.get("values", [])
+        tail = columns[0] if columns else []
+    except Exception:
+        return set()
+    save_url_cache(key, cached, tail)
+    urls = set(cached)
+    urls.update(tail)
+    urls.discard("")
+    _existing_urls_cache[key] = urls
+    return urls
 
-            url = article.get("original_link", "")
-            if url in existing_urls:
-                skipped_duplicate += 1
-                continue
 
-            # Safely handle list fields that might be strings or None
-            companies = article.get("companies_mentioned", [])
-            if isinstance(companies, str):
-                companies = [companies]
-            elif not isinstance(companies, list):
-                companies = []
-
-            entities = article.get("key_entities", [])
-            if isinstance(entities, str):
-                entities = [entities]
-            elif not isinstance(entities, list):
-                entities = []
-
-            rows.append([
-                str(article.get("original_date", "")),
-                str(article.get("original_title", "")),
-                str(article.get("original_source", "")),
-                str(article.get("category", "")),
-                ", ".join(str(c) for c in companies),
-                str(article.get("funding_amount") or ""),
-                str(article.get("summary", "")),
-                url,
-                ", ".join(str(e) for e in entities),
-                datetime.now().strftime("%Y-%m-%d %H:%M")
-            ])
-
-        print(
-            f"  Skipped: {skipped_relevance} not relevant, {skipped_duplicate} duplicates")
-        print(f"  Adding {len(rows)} new rows to sheet...")
+def append_to_sheet(articles: list, sheet=None, existing_urls: set = None) -> int:
+    """Add articles to Google Sheet. Returns count added.
+
+    existing_urls is updated in place with the URLs that were appended.
+    """
+    if not articles:
+        logger.info("  No articles to add")
+        return 0
+
+    logger.info(f"  Processing {len(articles)} articles for sheet...")
 
+    written = 0
+    try:
+        if sheet is None:
+            sheet = open_news_sheet()
+
+        if existing_urls is None:
+            existing_urls = get_existing_urls(sheet)
+            logger.info(f"  Found {len(existing_urls)} existing URLs")
+
+        # Fields were normalized in attach_article_fields
+        relevant = [a for a in articles if a.get("relevance")]
+        added_at = datetime.now().strftime("%Y-%m-%d %H:%M")
+        rows = [[
+            a["original_date"],
+            a["original_title"],
+            a["original_source"],
+            a["category"],
+            ", ".join(a["companies_mentioned"]),
+            a["funding_amount"],
+            a["summary"],
+            a["original_link"],
+            ", ".join(a["key_entities"]),
+            added_at
+        ] for a in relevant if a["original_link"] not in existing_urls]
+        skipped_relevance = len(articles) - len(relevant)
+        skipped_duplicate = len(relevant) - len(rows)
+
+        logger.info(
+            f"  Skipped: {skipped_relevance} not relevant, {skipped_duplicate} duplicates")
+        logger.info(f"  Adding {len(rows)} new rows to sheet...")
+
+        # Chunk large uploads (~10k cells per request) to stay under API limits
+        for i in range(0, len(rows), SHEETS_APPEND_CHUNK):
+            chunk = rows[i:i + SHEETS_APPEND_CHUNK]
+            sheet.append_rows(chunk, value_input_option="RAW",
+                              insert_data_option="INSERT_ROWS")
+            existing_urls.update(row[7] for row in chunk)
+            written += len(chunk)
         if rows:
-            sheet.append_rows(rows)
-            print(f"  ✓ Successfully added {len(rows)} rows")
+            logger.info(f"  ✓ Successfully added {len(rows)} rows")
 
-        return len(rows)
+        return written
     except Exception as e:
-        print(f"  ⚠️ Sheets error: {e}")
-        import traceback
-        traceback.print_exc()
-        return 0
+        logger.exception(f"  ⚠️ Sheets error after adding {written} rows: {e}")
+        return written
+
+# =============================================================================
+# FILTERING & DEDUPLICATION
+# =============================================================================
+
+
+def matches_keywords(article: dict) -> bool:
+    """Cheap relevance pre-check on title + snippet before spending Claude tokens."""
+    text = f"{article.get('title', '')} {article.get('snippet', '')}"
+    return _KEYWORD_RE.search(text) is not None
+
+
+def _title_shingles(title: str, k: int = 5) -> set:
+    """Character k-grams of a normalized title."""
+    text = " ".join(re.findall(r"\w+", title.lower()))
+    if len(text) <= k:
+        return {text}
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+def group_near_duplicates(articles: list, threshold: float = NEAR_DUP_THRESHOLD) -> tuple:
+    """Pick one representative per near-identical story.
+
+    Articles with the same date whose titles nearly match (across sources) are
+    grouped, so only the first is sent to Claude. Returns (representatives,
+    {representative link: [duplicate articles]}) for copy_to_duplicates.
+    """
+    representatives = []
+    duplicates = {}
+    seen_by_date = {}
+    for article in articles:
+        shingles = _title_shingles(article.get("title", ""))
+        seen = seen_by_date.setdefault(article.get("date", ""), [])
+        match = next((rep for rep, other in seen
+                      if len(shingles & other) / len(shingles | other) >= threshold),
+                     None)
+        if match is not None:
+            duplicates.setdefault(match["link"], []).append(article)
+            continue
+        seen.append((article, shingles))
+        representatives.append(article)
+    return representatives, duplicates
+
+
+def copy_to_duplicates(results: list, duplicates: dict) -> list:
+    """Give each near-duplicate article its representative's analysis."""
+    copies = []
+    for r in results:
+        for article in duplicates.get(r["original_link"], []):
+            copy = {f: r.get(f) for f in ANALYSIS_FIELDS}
+            copy["id"] = 0
+            copies.extend(attach_article_fields([copy], [article]))
+    return results + copies
 
 # =============================================================================
 # BACKFILL
 # =============================================================================
 
 
-def run_backfill(start_date: str = "2025-11-01"):
-    """Run historical news backfill."""
-    end_date = datetime.now().strftime("%Y-%m-%d")
+def analyze_articles(articles: list, use_batch_api: bool = USE_BATCH_API) -> list:
+    """Split articles into batches and analyze them with Claude.
 
-    print("=" * 60)
-    print("📚 HISTORICAL BACKFILL")
-    print(f"   Date range: {start_date} to {end_date}")
-    print("=" * 60)
+    Each batch's results are cached as soon as they arrive.
+    """
+    batches = make_batches(articles)
+    total_batches = len(batches)
 
-    all_articles = []
+    logger.info(
+        f"  Processing {len(articles)} articles in {total_batches} batches "
+        f"of up to {max(map(len, batches), default=0)}")
 
-    for i, query in enumerate(SEARCH_QUERIES):
-        print(f"\n[{i+1}/{len(SEARCH_QUERIES)}] Searching: {query}")
-        articles = search_news(query, start_date, end_date)
-        print(f"  → Found {len(articles)} articles")
-        all_articles.extend(articles)
-        time.sleep(1)
+    analyzed = None
+    if use_batch_api and batches:
+        analyzed = analyze_articles_batch_api(batches)
+        if analyzed is None:
+            logger.info("  Falling back to synchronous requests")
 
-    # Deduplicate by URL
-    seen = set()
-    unique = []
-    for article in all_articles:
-        url = article.get("link", "")
-        if url not in seen:
-            seen.add(url)
-            unique.append(article)
+    if analyzed is None:
+        # Batches are paced by the shared token bucket, not a fixed delay
+        analyzed = []
+        logger.info(f"  Rate budget: {CLAUDE_TPM_LIMIT} tokens/min, "
+                    f"{CLAUDE_RPM_LIMIT} requests/min, "
+                    f"{CLAUDE_WORKERS} concurrent batches\n")
+        with ThreadPoolExecutor(max_workers=CLAUDE_WORKERS) as executor:
+            for batch_num, (batch, results) in enumerate(
+                    zip(batches, executor.map(analyze_articles_with_claude, batches)), 1):
+                analyzed.extend(results)
+                cache_analyses(results, batch)
+                logger.info(f"  [{batch_num}/{total_batches}] "
+                            f"✓ {len(results)} results from {len(batch)} articles")
 
-    print(f"\n📊 Total unique articles: {len(unique)}")
-    print("🤖 Analyzing with Claude AI...")
+    return analyzed
 
-    # Process in tiny batches (3 articles) with 60s delays
-    analyzed = []
-    batch_size = 3  # Tiny batches = fewer tokens per request
-    total_batches = (len(unique) + batch_size - 1) // batch_size
-
-    print(
-        f"  Processing {len(unique)} articles in {total_batches} batches of {batch_size}")
-    print(f"  Estimated time: ~{total_batches} minutes\n")
-
-    for i in range(0, len(unique), batch_size):
-        batch = unique[i:i + batch_size]
-        batch_num = i // batch_size + 1
-        print(f"  [{batch_num}/{total_batches}] Analyzing {len(batch)} articles...")
-        results = analyze_articles_with_claude(batch)
-        analyzed.extend(results)
-        print(f"    ✓ {len(results)} results")
-
-        # Wait 60 seconds between batches
-        if i + batch_size < len(unique):
-            print(f"    Waiting 60s...")
-            time.sleep(60)
+
+def run_backfill(start_date: str = "2025-11-01", use_batch_api: bool = USE_BATCH_API):
+    """Run historical news backfill."""
+    end_date = datetime.now().strftime("%Y-%m-%d")
+
+    logger.info("=" * 60)
+    logger.info("📚 HISTORICAL BACKFILL")
+    logger.info(f"   Date range: {start_date} to {end_date}")
+    logger.info("=" * 60)
+
+    try:
+        sheet = open_news_sheet()
+        existing_urls = get_existing_urls(sheet)
+    except Exception as e:
+        logger.error(f"❌ Could not open Google Sheet: {e}")
+        return
+    logger.info(f"\n📄 Sheet has {len(existing_urls)} existing URLs")
+
+    logger.info(f"\n🔎 Searching {len(SEARCH_QUERIES)} queries...")
+    results = search_news_bulk(SEARCH_QUERIES, start_date, end_date)
+    if results is None:
+        logger.info("  Falling back to one request per query")
+        results = search_news_concurrent(SEARCH_QUERIES, start_date, end_date)
+    else:
+        for i, (query, articles) in enumerate(zip(SEARCH_QUERIES, results)):
+            logger.info(f"  [{i+1}/{len(SEARCH_QUERIES)}] {query} → {len(articles)} articles")
+
+    all_articles = [a for articles in results for a in articles]
+
+    # Deduplicate by URL (articles without a link are dropped)
+    unique = list({a["link"]: a for a in all_articles if a.get("link")}.values())
+
+    # Skip articles already in the sheet before paying for Claude
+    new_articles = [a for a in unique if a.get("link") not in existing_urls]
+    logger.info(f"\n📊 Total unique articles: {len(unique)} "
+                f"({len(unique) - len(new_articles)} already in sheet)")
+    on_topic = [a for a in new_articles if matches_keywords(a)]
+    if len(on_topic) < len(new_articles):
+        logger.info(f"  Dropped {len(new_articles) - len(on_topic)} articles with no crop/investment keywords")
+    # Group after filtering so each kept article survives on its own keywords
+    unique, duplicates = group_near_duplicates(on_topic)
+    if len(unique) < len(on_topic):
+        logger.info(f"  {len(on_topic) - len(unique)} near-duplicate titles "
+                    f"will reuse another article's analysis")
+    logger.info("🤖 Analyzing with Claude AI...")
+
+    resumed, unique = split_recovered_articles(unique, resume_batch_jobs())
+    cached, unique = split_cached_articles(unique)
+    cached = resumed + cached
+    if cached:
+        logger.info(f"  Reusing {len(cached)} cached analyses")
+
+    analyzed = cached + analyze_articles(unique, use_batch_api)
+    analyzed = copy_to_duplicates(analyzed, duplicates)
 
     relevant = sum(1 for a in analyzed if a.get("relevance"))
-    print(f"\n✅ Relevant articles: {relevant}")
+    logger.info(f"\n✅ Relevant articles: {relevant}")
 
-    print("📤 Uploading to Google Sheets...")
-    added = append_to_sheet(analyzed)
-    print(f"✅ Added {added} new articles")
+    logger.info("📤 Uploading to Google Sheets...")
+    added = append_to_sheet(analyzed, sheet, existing_urls)
+    logger.info(f"✅ Added {added} new articles")
 
-    print("\n" + "=" * 60)
-    print("✅ BACKFILL COMPLETE!")
-    print("=" * 60)
+    logger.info("\n" + "=" * 60)
+    logger.info("✅ BACKFILL COMPLETE!")
+    logger.info("=" * 60)
 
 # =============================================================================
 # MAIN
@@ -400,9 +1175,9 @@ def run_backfill(start_date: str = "2025-11-01"):
 
 
 def main():
-    print("\n" + "🌿" * 30)
-    print("  GHANA CASH CROP NEWS MONITOR")
-    print("🌿" * 30 + "\n")
+    logger.info("\n" + "🌿" * 30)
+    logger.info("  GHANA CASH CROP NEWS MONITOR")
+    logger.info("🌿" * 30 + "\n")
 
     check_environment()
 
@@ -412,11 +1187,11 @@ def main():
 
     if mode == "backfill":
         run_backfill(start_date)
-        print("\n🏁 Done! You can delete this Railway service now.")
-        print("   Your n8n workflow will handle ongoing monitoring.")
+        logger.info("\n🏁 Done! You can delete this Railway service now.")
+        logger.info("   Your n8n workflow will handle ongoing monitoring.")
     else:
-        print(f"Unknown mode: {mode}")
-        print("Usage: python main.py backfill")
+        logger.info(f"Unknown mode: {mode}")
+        logger.info("Usage: python main.py backfill")
 
 
 if __name__ == "__main__":